@@ -1,13 +1,26 @@
 import chainlit as cl
-from openai import OpenAI
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+import httpx
+import asyncio
+import itertools
 import os
 import json
+import logging
 import re
-from datetime import datetime
+import tempfile
+import threading
+import time
+from datetime import date, datetime
 from dotenv import load_dotenv
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:  # optional speedup; stdlib json is used otherwise
+    orjson = None
+
 # --- CONFIGURATION ---
+logger = logging.getLogger(__name__)
 load_dotenv(Path(__file__).parent / ".env")
 API_KEY = os.getenv("OPENAI_API_KEY", "")
 DATA_DIR = Path(__file__).parent / "data"
@@ -15,8 +28,10 @@ JOURNAL_DIR = DATA_DIR / "journal"
 CONTEXT_FILE = DATA_DIR / "context.md"
 TASKS_FILE = DATA_DIR / "tasks.json"
 STREAK_FILE = DATA_DIR / "streak.json"
-ENERGY_FILE = DATA_DIR / "energy.json"
+ENERGY_DIR = DATA_DIR / "energy"  # one JSON-lines file per day
+LEGACY_ENERGY_FILE = DATA_DIR / "energy.json"  # old multi-day store, split into ENERGY_DIR on startup
 WEEKLY_GOALS_FILE = DATA_DIR / "weekly_goals.json"
+CONTEXT_PROMPT_LIMIT = 2000  # characters of context.md sent with each prompt
 
 CATEGORIES = {
     "work": "💼 Work",
@@ -28,78 +43,245 @@ CATEGORIES = {
 
 # Ensure directories exist
 JOURNAL_DIR.mkdir(parents=True, exist_ok=True)
-
-# Setup OpenAI
-client = OpenAI(api_key=API_KEY) if API_KEY else None
+ENERGY_DIR.mkdir(parents=True, exist_ok=True)
+
+# Setup OpenAI lazily; one keep-alive connection pool is shared by every chat session
+_client = None
+
+def get_client():
+    """Return the shared OpenAI client, creating it on first use (None without an API key)"""
+    global _client
+    if _client is None and API_KEY:
+        _client = AsyncOpenAI(
+            api_key=API_KEY,
+            http_client=DefaultAsyncHttpxClient(
+                limits=httpx.Limits(max_keepalive_connections=4, keepalive_expiry=60)
+            ),
+        )
+    return _client
 
 # --- HELPER FUNCTIONS ---
+# (epoch second, now, today, week, time of day, HH:MM) - these are read many times per turn
+_clock_cache = (None, None, "", "", "", "")
+
+def _clock():
+    global _clock_cache
+    second = int(time.time())
+    if second != _clock_cache[0]:
+        now = datetime.now()
+        if now.hour < 12:
+            time_of_day = "morning"
+        elif now.hour < 17:
+            time_of_day = "afternoon"
+        else:
+            time_of_day = "evening"
+        _clock_cache = (second, now, now.strftime("%Y-%m-%d"), now.strftime("%Y-W%W"), time_of_day, now.strftime("%H:%M"))
+    return _clock_cache
+
+def get_now():
+    return _clock()[1]
+
 def get_today():
-    return datetime.now().strftime("%Y-%m-%d")
+    return _clock()[2]
 
 def get_week_number():
-    return datetime.now().strftime("%Y-W%W")
+    return _clock()[3]
 
 def get_time_of_day():
-    hour = datetime.now().hour
-    if hour < 12:
-        return "morning"
-    elif hour < 17:
-        return "afternoon"
-    return "evening"
+    return _clock()[4]
+
+def get_timestamp():
+    return _clock()[5]
+
+# (mtime_ns, size) -> text of context.md; it rarely changes between messages
+_context_cache = (None, "")
 
 def read_context():
-    if not CONTEXT_FILE.exists():
+    global _context_cache
+    try:
+        st = CONTEXT_FILE.stat()
+    except FileNotFoundError:
         default = """# About Me
 - Role: [your role]
 - Current focus: [main project]
 - Working style: [preferences]
 """
         CONTEXT_FILE.write_text(default)
-    return CONTEXT_FILE.read_text()
+        st = CONTEXT_FILE.stat()
+    key = (st.st_mtime_ns, st.st_size)
+    if _context_cache[0] != key:
+        _context_cache = (key, CONTEXT_FILE.read_text())
+    return _context_cache[1]
+
+# Seeded from the clock so ids keep increasing across restarts
+_ID_COUNTER = itertools.count(time.time_ns())
+
+def _new_id():
+    return f"{next(_ID_COUNTER):x}"
+
+def _add_lowercase(records, key):
+    # In-memory only (see _for_disk): lowercased text for name matching
+    for r in records:
+        r["_lc"] = r[key].lower()
+
+def _find_by_name(items, key, name):
+    """Return the item whose text equals name, else the first one containing it"""
+    name = name.lower()
+    fallback = None
+    for item in items:
+        lc = item["_lc"]
+        if lc == name:
+            return item
+        if fallback is None and name in lc:
+            fallback = item
+    return fallback
+
+def _read_or(path, default):
+    """Read path as bytes, or return default if it doesn't exist"""
+    try:
+        return path.read_bytes()
+    except FileNotFoundError:
+        return default
 
-# --- WEEKLY GOALS ---
-def read_weekly_goals():
-    if not WEEKLY_GOALS_FILE.exists():
-        default = {"week": get_week_number(), "goals": []}
-        WEEKLY_GOALS_FILE.write_text(json.dumps(default, indent=2))
+# --- JSON STATE ---
+# Parsed state files keyed by path -> (mtime_ns, size, data)
+_JSON_CACHE = {}
+# Guards every read-modify-save of the cached state; actions and snapshots run in
+# worker threads and several chat sessions can be active at once
+_STATE_LOCK = threading.RLock()
+# Bumped on every state write so derived snapshots can tell they're stale
+_state_version = 0
+
+# Record fields derived on load that must never be written back to disk
+_MEMORY_ONLY_FIELDS = ("_lc",)
+
+def _for_disk(data):
+    """Copy of a state dict with in-memory-only fields dropped from its record lists"""
+    return {
+        k: [{f: val for f, val in r.items() if f not in _MEMORY_ONLY_FIELDS} if isinstance(r, dict) else r for r in v]
+        if isinstance(v, list) else v
+        for k, v in data.items()
+    }
+
+def _json_default(obj):
+    # In-memory sets (e.g. habit completions) are stored as sorted lists
+    if isinstance(obj, set):
+        return sorted(obj)
+    raise TypeError(f"{type(obj).__name__} is not JSON serializable")
+
+def _json_dumps(data):
+    if orjson:
+        return orjson.dumps(data, default=_json_default)
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False, default=_json_default).encode("utf-8")
+
+def _json_loads(raw):
+    return orjson.loads(raw) if orjson else json.loads(raw)
+
+def _load_json(path, default=None, prepare=None):
+    """Return parsed JSON for path, reparsing only if the file changed on disk.
+    prepare(data) runs once per parse to build in-memory-only structures."""
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        _JSON_CACHE.pop(path, None)
         return default
-    data = json.loads(WEEKLY_GOALS_FILE.read_text())
-    if data.get("week") != get_week_number():
-        if data.get("goals"):
-            archive_weekly_goals(data)
-        data = {"week": get_week_number(), "goals": []}
-        WEEKLY_GOALS_FILE.write_text(json.dumps(data, indent=2))
+    cached = _JSON_CACHE.get(path)
+    if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return cached[2]
+    data = _json_loads(path.read_bytes())
+    if prepare:
+        prepare(data)
+    _JSON_CACHE[path] = (st.st_mtime_ns, st.st_size, data)
     return data
 
+def _atomic_write_json(path, data):
+    """Write compact JSON to a unique temp file beside path and rename it over path"""
+    _atomic_write_bytes(path, _json_dumps(data))
+
+def _atomic_write_bytes(path, payload):
+    payload = memoryview(payload)
+    # Plain fd write: these files are small, so skip the buffered/text file layers
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=".tmp")
+    try:
+        try:
+            os.fchmod(fd, 0o644)
+            while payload:
+                payload = payload[os.write(fd, payload):]
+        finally:
+            os.close(fd)
+        os.replace(tmp, path)
+    except BaseException:
+        # Never leave a partial temp file behind
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+
+def _save_json(path, data):
+    """Write JSON and refresh the cache entry so the next read skips parsing"""
+    global _state_version
+    with _STATE_LOCK:
+        try:
+            _atomic_write_json(path, _for_disk(data))
+            st = path.stat()
+        except BaseException:
+            # Callers edit the cached object in place; drop it so reads go back to disk
+            _JSON_CACHE.pop(path, None)
+            raise
+        _state_version += 1
+        _JSON_CACHE[path] = (st.st_mtime_ns, st.st_size, data)
+
+# --- WEEKLY GOALS ---
+def _prepare_goals(data):
+    _add_lowercase(data["goals"], "goal")
+
+def read_weekly_goals():
+    with _STATE_LOCK:
+        data = _load_json(WEEKLY_GOALS_FILE, prepare=_prepare_goals)
+        if data is None:
+            data = {"week": get_week_number(), "goals": []}
+            save_weekly_goals(data)
+            return data
+        if data.get("week") != get_week_number():
+            if data.get("goals"):
+                archive_weekly_goals(data)
+            data = {"week": get_week_number(), "goals": []}
+            save_weekly_goals(data)
+        return data
+
 def save_weekly_goals(data):
-    WEEKLY_GOALS_FILE.write_text(json.dumps(data, indent=2))
+    _save_json(WEEKLY_GOALS_FILE, data)
 
 def add_weekly_goal(goal_text, category="work"):
-    data = read_weekly_goals()
-    goal = {
-        "id": datetime.now().strftime("%Y%m%d%H%M%S%f"),
-        "goal": goal_text,
-        "category": category,
-        "completed": False,
-        "created": get_today()
-    }
-    data["goals"].append(goal)
-    save_weekly_goals(data)
+    with _STATE_LOCK:
+        data = read_weekly_goals()
+        goal = {
+            "id": _new_id(),
+            "goal": goal_text,
+            "_lc": goal_text.lower(),
+            "category": category,
+            "completed": False,
+            "created": get_today()
+        }
+        data["goals"].append(goal)
+        save_weekly_goals(data)
 
 def complete_weekly_goal_by_name(goal_name):
-    data = read_weekly_goals()
-    goal_lower = goal_name.lower()
-    for g in data["goals"]:
-        if not g["completed"] and goal_lower in g["goal"].lower():
+    with _STATE_LOCK:
+        data = read_weekly_goals()
+        g = _find_by_name((g for g in data["goals"] if not g["completed"]), "goal", goal_name)
+        if g:
             g["completed"] = True
             g["completed_date"] = get_today()
             save_weekly_goals(data)
             return g["goal"]
-    return None
+        return None
 
 def archive_weekly_goals(data):
-    completed = [g for g in data["goals"] if g["completed"]]
-    incomplete = [g for g in data["goals"] if not g["completed"]]
+    completed, incomplete = [], []
+    for g in data["goals"]:
+        (completed if g["completed"] else incomplete).append(g)
     summary = f"## 📅 Week {data['week']} Summary\n\n"
     summary += f"**Completed ({len(completed)}):**\n"
     for g in completed:
@@ -109,219 +291,295 @@ def archive_weekly_goals(data):
         summary += f"- ❌ {g['goal']}\n"
     append_journal(summary)
 
-def get_weekly_progress():
-    data = read_weekly_goals()
-    total = len(data["goals"])
-    completed = len([g for g in data["goals"] if g["completed"]])
-    return completed, total
+def get_weekly_progress(data=None):
+    """Return (completed, total) for this week's goals; pass data if already loaded"""
+    data = data or read_weekly_goals()
+    completed = sum(1 for g in data["goals"] if g["completed"])
+    return completed, len(data["goals"])
 
 # --- TASK MANAGEMENT ---
+def _prepare_tasks(data):
+    # Habit completions become sets so done-today checks are O(1)
+    for t in data["recurring"]:
+        t["completions"] = set(t.get("completions", ()))
+    _add_lowercase(data["tasks"], "task")
+    _add_lowercase(data["recurring"], "task")
+
 def read_tasks():
-    if not TASKS_FILE.exists():
-        default = {"recurring": [], "tasks": []}
-        TASKS_FILE.write_text(json.dumps(default, indent=2))
-        return default
-    return json.loads(TASKS_FILE.read_text())
+    with _STATE_LOCK:
+        data = _load_json(TASKS_FILE, prepare=_prepare_tasks)
+        if data is None:
+            data = {"recurring": [], "tasks": []}
+            save_tasks(data)
+        return data
 
 def save_tasks(data):
-    TASKS_FILE.write_text(json.dumps(data, indent=2))
+    _save_json(TASKS_FILE, data)
 
 def add_task(task_text, category="work", is_recurring=False):
-    data = read_tasks()
-    task = {
-        "id": datetime.now().strftime("%Y%m%d%H%M%S%f"),
-        "task": task_text,
-        "category": category,
-        "status": "todo",
-        "created": get_today()
-    }
-    if is_recurring:
-        task["recurring"] = True
-        data["recurring"].append(task)
-    else:
-        data["tasks"].append(task)
-    save_tasks(data)
+    with _STATE_LOCK:
+        data = read_tasks()
+        task = {
+            "id": _new_id(),
+            "task": task_text,
+            "_lc": task_text.lower(),
+            "category": category,
+            "status": "todo",
+            "created": get_today()
+        }
+        if is_recurring:
+            task["recurring"] = True
+            task["completions"] = set()
+            data["recurring"].append(task)
+        else:
+            data["tasks"].append(task)
+        save_tasks(data)
 
 def complete_task_by_name(task_name):
-    data = read_tasks()
-    task_lower = task_name.lower()
-    for t in data["tasks"]:
-        if t["status"] == "todo" and task_lower in t["task"].lower():
+    with _STATE_LOCK:
+        data = read_tasks()
+        today = get_today()
+        t = _find_by_name((t for t in data["tasks"] if t["status"] == "todo"), "task", task_name)
+        if t:
             t["status"] = "done"
-            t["completed"] = get_today()
+            t["completed"] = today
             save_tasks(data)
             return t["task"]
-    # Check recurring
-    for t in data["recurring"]:
-        if task_lower in t["task"].lower():
-            if "completions" not in t:
-                t["completions"] = []
-            if get_today() not in t["completions"]:
-                t["completions"].append(get_today())
-                save_tasks(data)
-                return t["task"]
-    return None
+        # Check recurring
+        t = _find_by_name((t for t in data["recurring"] if today not in t["completions"]), "task", task_name)
+        if t:
+            t["completions"].add(today)
+            save_tasks(data)
+            return t["task"]
+        return None
 
 def get_open_tasks():
     data = read_tasks()
     return [t for t in data["tasks"] if t["status"] == "todo"]
 
-def get_recurring_tasks():
+# (tasks data, state version, today, view) - reused until the next write or day change
+_tasks_view_cache = (None, None, None, None)
+
+def tasks_view():
+    """Single pass over tasks: (open tasks, open task names by category, habit pairs)"""
+    global _tasks_view_cache
     data = read_tasks()
     today = get_today()
-    result = []
-    for t in data["recurring"]:
-        done_today = today in t.get("completions", [])
-        result.append({**t, "done_today": done_today})
-    return result
+    cached_data, version, day, view = _tasks_view_cache
+    if cached_data is data and version == _state_version and day == today:
+        return view
+    open_list = []
+    by_cat = {}
+    for t in data["tasks"]:
+        if t["status"] == "todo":
+            open_list.append(t)
+            by_cat.setdefault(t.get("category", "work"), []).append(t["task"])
+    recurring = [(t, today in t["completions"]) for t in data["recurring"]]
+    view = (open_list, by_cat, recurring)
+    _tasks_view_cache = (data, _state_version, today, view)
+    return view
 
 # --- ENERGY TRACKING ---
-def read_energy():
-    if not ENERGY_FILE.exists():
-        return {}
-    return json.loads(ENERGY_FILE.read_text())
+def get_energy_path(date=None):
+    date = date or get_today()
+    return ENERGY_DIR / f"{date}.jsonl"
+
+def read_energy(date=None):
+    """Return the day's energy readings, oldest first"""
+    raw = _read_or(get_energy_path(date), b"")
+    return [_json_loads(line) for line in raw.splitlines() if line.strip()]
 
 def log_energy(level, note=""):
-    data = read_energy()
-    today = get_today()
-    timestamp = datetime.now().strftime("%H:%M")
-    if today not in data:
-        data[today] = []
-    data[today].append({"time": timestamp, "level": level, "note": note})
-    ENERGY_FILE.write_text(json.dumps(data, indent=2))
+    global _state_version
+    entry = {"time": get_timestamp(), "level": level, "note": note}
+    with get_energy_path().open("ab") as f:
+        f.write(_json_dumps(entry) + b"\n")
+    _state_version += 1
 
 def get_latest_energy():
-    data = read_energy()
-    today_energy = data.get(get_today(), [])
+    today_energy = read_energy()
     return today_energy[-1] if today_energy else None
 
+def migrate_legacy_energy():
+    """Split the old multi-day energy.json into per-day files, then rename it aside"""
+    try:
+        data = _json_loads(LEGACY_ENERGY_FILE.read_bytes())
+    except FileNotFoundError:
+        return
+    for day, entries in data.items():
+        path = get_energy_path(day)
+        legacy = b"".join(_json_dumps(e) + b"\n" for e in entries)
+        existing = _read_or(path, b"")
+        # Skip days an interrupted earlier run already wrote
+        if not existing.startswith(legacy):
+            # Legacy readings are older than anything logged since the upgrade
+            _atomic_write_bytes(path, legacy + existing)
+    LEGACY_ENERGY_FILE.replace(LEGACY_ENERGY_FILE.with_name("energy.json.migrated"))
+
+migrate_legacy_energy()
+
 # --- JOURNAL ---
+_JOURNAL_LOCK = threading.Lock()
+
 def get_journal_path(date=None):
     date = date or get_today()
     return JOURNAL_DIR / f"{date}.md"
 
-def read_today_journal():
-    path = get_journal_path()
-    return path.read_text() if path.exists() else ""
+def read_journal_tail(max_bytes=1500):
+    """Return the last max_bytes of today's journal without reading the whole file"""
+    try:
+        f = get_journal_path().open("rb")
+    except FileNotFoundError:
+        return ""
+    with f:
+        size = f.seek(0, os.SEEK_END)
+        if size > max_bytes:
+            f.seek(size - max_bytes)
+            data = b"... (truncated)\n\n" + f.read()
+        else:
+            f.seek(0)
+            data = f.read()
+    return data.decode("utf-8", "ignore")
 
 def append_journal(entry):
-    path = get_journal_path()
-    timestamp = datetime.now().strftime("%H:%M")
-    if path.exists():
-        content = path.read_text()
-    else:
-        content = f"# Journal: {get_today()} ({datetime.now().strftime('%A')})\n\n"
-    content += f"**{timestamp}** - {entry}\n\n"
-    path.write_text(content)
+    append_journal_many([entry])
+
+def append_journal_many(entries):
+    """Append several entries with a single open/write"""
+    timestamp = get_timestamp()
+    text = "".join(f"**{timestamp}** - {entry}\n\n" for entry in entries)
+    # Serialized so concurrent first writes of the day can't both add the header
+    with _JOURNAL_LOCK, get_journal_path().open("a", encoding="utf-8") as f:
+        # Append mode starts at end-of-file, so position 0 means a new file
+        if f.tell() == 0:
+            text = f"# Journal: {get_today()} ({get_now():%A})\n\n" + text
+        f.write(text)
 
 # --- STREAK ---
 def get_streak():
-    if not STREAK_FILE.exists():
-        return {"current": 0, "longest": 0, "last_checkin": None, "total_days": 0}
-    return json.loads(STREAK_FILE.read_text())
+    return _load_json(STREAK_FILE, {"current": 0, "longest": 0, "last_checkin": None, "total_days": 0})
 
 def update_streak():
-    streak = get_streak()
-    today = get_today()
-    if streak["last_checkin"] == today:
+    with _STATE_LOCK:
+        streak = get_streak()
+        today = get_today()
+        if streak["last_checkin"] == today:
+            return streak
+        try:
+            if streak["last_checkin"]:
+                last = date.fromisoformat(streak["last_checkin"])
+                diff = (get_now().date() - last).days
+                if diff == 1:
+                    streak["current"] += 1
+                    streak["total_days"] += 1
+                    if streak["current"] > streak.get("longest", 0):
+                        streak["longest"] = streak["current"]
+                elif diff > 1:
+                    streak["current"] = 1
+                    streak["total_days"] += 1
+            else:
+                streak["current"] = 1
+                streak["total_days"] = 1
+            streak["last_checkin"] = today
+        except BaseException:
+            # A half-applied update must not outlive the failure in the cache
+            _JSON_CACHE.pop(STREAK_FILE, None)
+            raise
+        _save_json(STREAK_FILE, streak)
         return streak
-    if streak["last_checkin"]:
-        last = datetime.strptime(streak["last_checkin"], "%Y-%m-%d")
-        diff = (datetime.now() - last).days
-        if diff == 1:
-            streak["current"] += 1
-            streak["total_days"] += 1
-            if streak["current"] > streak.get("longest", 0):
-                streak["longest"] = streak["current"]
-        elif diff > 1:
-            streak["current"] = 1
-            streak["total_days"] += 1
-    else:
-        streak["current"] = 1
-        streak["total_days"] = 1
-    streak["last_checkin"] = today
-    STREAK_FILE.write_text(json.dumps(streak, indent=2))
-    return streak
 
 # --- AI WITH ACTIONS ---
+_ACTION_RE = re.compile(r'\[ACTION:(\w+):(\w+):([^\]]+)\]')
+
+def _action_task(content, category):
+    add_task(content, category=category)
+    return f"📋 Added task: {content}"
+
+def _action_goal(content, category):
+    add_weekly_goal(content, category=category)
+    return f"🎯 Added weekly goal: {content}"
+
+def _action_habit(content, category):
+    add_task(content, category=category, is_recurring=True)
+    return f"📅 Added daily habit: {content}"
+
+def _action_energy(content, category):
+    log_energy(category, content)
+    return f"🔋 Logged energy: {category}"
+
+def _action_complete(content, category):
+    completed = complete_task_by_name(content)
+    if completed:
+        return f"✅ Completed: {completed}"
+    # Try completing a goal
+    completed_goal = complete_weekly_goal_by_name(content)
+    if completed_goal:
+        return f"✅ Completed goal: {completed_goal}"
+    return None
+
+def _action_journal(content, category):
+    append_journal(f"💡 {content}")
+    return "📝 Journaled"
+
+# Action tag type -> handler(content, category) returning the action summary (or None)
+_ACTION_DISPATCH = {
+    "TASK": _action_task,
+    "GOAL": _action_goal,
+    "HABIT": _action_habit,
+    "ENERGY": _action_energy,
+    "COMPLETE": _action_complete,
+    "JOURNAL": _action_journal,
+}
+
+def _handle_action(match, actions_taken):
+    """Execute a single action tag; returns '' so re.sub strips the tag"""
+    action_type, category, content = match.groups()
+    handler = _ACTION_DISPATCH.get(action_type.upper())
+    if handler:
+        result = handler(content.strip(), category.lower())
+        if result:
+            actions_taken.append(result)
+    return ''
+
 def process_ai_actions(response_text):
-    """Parse AI response for action tags and execute them"""
+    """Parse AI response for action tags, execute them and strip them in one pass"""
     actions_taken = []
-    
-    action_pattern = r'\[ACTION:(\w+):(\w+):([^\]]+)\]'
-    matches = re.findall(action_pattern, response_text)
-    
-    for action_type, category, content in matches:
-        action_type = action_type.upper()
-        category = category.lower()
-        content = content.strip()
-        
-        if action_type == "TASK":
-            add_task(content, category=category)
-            actions_taken.append(f"📋 Added task: {content}")
-        
-        elif action_type == "GOAL":
-            add_weekly_goal(content, category=category)
-            actions_taken.append(f"🎯 Added weekly goal: {content}")
-        
-        elif action_type == "HABIT":
-            add_task(content, category=category, is_recurring=True)
-            actions_taken.append(f"📅 Added daily habit: {content}")
-        
-        elif action_type == "ENERGY":
-            log_energy(category, content)
-            actions_taken.append(f"🔋 Logged energy: {category}")
-        
-        elif action_type == "COMPLETE":
-            completed = complete_task_by_name(content)
-            if completed:
-                actions_taken.append(f"✅ Completed: {completed}")
-            else:
-                # Try completing a goal
-                completed_goal = complete_weekly_goal_by_name(content)
-                if completed_goal:
-                    actions_taken.append(f"✅ Completed goal: {completed_goal}")
-        
-        elif action_type == "JOURNAL":
-            append_journal(f"💡 {content}")
-            actions_taken.append(f"📝 Journaled")
-    
-    clean_response = re.sub(action_pattern, '', response_text).strip()
+    with _STATE_LOCK:
+        clean_response = _ACTION_RE.sub(lambda m: _handle_action(m, actions_taken), response_text).strip()
     return clean_response, actions_taken
 
-def get_ai_response(user_input):
-    if not client:
-        return "⚠️ No API key set. Add OPENAI_API_KEY to your .env file.", []
-    
-    context = read_context()
-    journal = read_today_journal()
-    open_tasks = get_open_tasks()
-    recurring = get_recurring_tasks()
-    energy = get_latest_energy()
-    time_of_day = get_time_of_day()
-    streak = get_streak()
-    weekly_goals = read_weekly_goals()
-    weekly_completed, weekly_total = get_weekly_progress()
-    
-    tasks_by_cat = {}
-    for t in open_tasks:
-        cat = t.get("category", "work")
-        if cat not in tasks_by_cat:
-            tasks_by_cat[cat] = []
-        tasks_by_cat[cat].append(t["task"])
-    
-    system_prompt = f"""You are a personal standup assistant. Help manage the user's day through natural conversation.
-
-CURRENT: {datetime.now().strftime("%A, %B %d, %Y at %H:%M")} ({time_of_day})
-STREAK: Day {streak['current']} | Best: {streak.get('longest', 1)} | Total: {streak.get('total_days', 1)}
-ENERGY: {energy['level'] if energy else 'Not logged'} {('- ' + energy.get('note', '')) if energy else ''}
+def snapshot_state():
+    """Read every state file once and derive everything the AI prompt needs"""
+    with _STATE_LOCK:
+        open_tasks, tasks_by_cat, recurring = tasks_view()
+        weekly_goals = read_weekly_goals()
+        weekly_completed, weekly_total = get_weekly_progress(weekly_goals)
+        
+        return {
+            "context": read_context(),
+            "open_tasks": open_tasks,
+            "tasks_by_cat": tasks_by_cat,
+            "recurring": recurring,
+            "energy": get_latest_energy(),
+            "streak": get_streak(),
+            "weekly_goals": weekly_goals,
+            "weekly_completed": weekly_completed,
+            "weekly_total": weekly_total,
+        }
+
+_SYSTEM_TEMPLATE = """You are a personal standup assistant. Help manage the user's day through natural conversation.
+
+CURRENT: {now} ({time_of_day})
+STREAK: Day {streak_current} | Best: {streak_longest} | Total: {streak_total}
+ENERGY: {energy}
 
 WEEKLY GOALS ({weekly_completed}/{weekly_total}):
-{json.dumps([g['goal'] + (' ✓' if g['completed'] else '') for g in weekly_goals.get('goals', [])], indent=2) if weekly_goals.get('goals') else 'None'}
+{weekly_goals}
 
-TASKS: {json.dumps(tasks_by_cat, indent=2) if tasks_by_cat else 'None'}
+TASKS:
+{tasks}
 
-HABITS: {', '.join([f"{'✓' if t['done_today'] else '○'} {t['task']}" for t in recurring]) if recurring else 'None'}
+HABITS: {habits}
 
 CONTEXT: {context}
 
@@ -345,35 +603,111 @@ RULES:
 
 USER: {user_input}"""
 
+async def get_ai_response(user_input, msg, snapshot=None, journal_task=None):
+    """Stream the reply into msg, then run its actions; returns (clean_response, actions).
+    journal_task (the user-input journal write) is awaited before any action can journal."""
+    client = get_client()
+    if not client:
+        return "⚠️ No API key set. Add OPENAI_API_KEY to your .env file.", []
+    
+    s = snapshot or await asyncio.to_thread(snapshot_state)
+    context = s["context"]
+    recurring = s["recurring"]
+    energy = s["energy"]
+    time_of_day = get_time_of_day()
+    streak = s["streak"]
+    weekly_goals = s["weekly_goals"]
+    weekly_completed, weekly_total = s["weekly_completed"], s["weekly_total"]
+    tasks_by_cat = s["tasks_by_cat"]
+    
+    system_prompt = _SYSTEM_TEMPLATE.format_map({
+        "now": get_now().strftime("%A, %B %d, %Y at %H:%M"),
+        "time_of_day": time_of_day,
+        "streak_current": streak['current'],
+        "streak_longest": streak.get('longest', 1),
+        "streak_total": streak.get('total_days', 1),
+        "energy": f"{energy['level']} - {energy.get('note', '')}" if energy else "Not logged",
+        "weekly_completed": weekly_completed,
+        "weekly_total": weekly_total,
+        "weekly_goals": "\n".join(f"- {'✓' if g['completed'] else '○'} {g['goal']}" for g in weekly_goals['goals']) or 'None',
+        "tasks": "\n".join(f"{cat}: " + ", ".join(v) for cat, v in tasks_by_cat.items()) if tasks_by_cat else 'None',
+        "habits": ', '.join([f"{'✓' if done else '○'} {t['task']}" for t, done in recurring]) if recurring else 'None',
+        "context": context if len(context) <= CONTEXT_PROMPT_LIMIT else context[:CONTEXT_PROMPT_LIMIT] + "\n... (truncated)",
+        "user_input": user_input,
+    })
+
     try:
-        response = client.chat.completions.create(
+        stream = await client.chat.completions.create(
             model="gpt-4o-mini",
             messages=[
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_input}
             ],
-            max_tokens=400
+            max_tokens=400,
+            stream=True
         )
-        raw = response.choices[0].message.content
-        return process_ai_actions(raw)
+        buf = []
+        async for chunk in stream:
+            token = (chunk.choices[0].delta.content or "") if chunk.choices else ""
+            if token:
+                buf.append(token)
+                await msg.stream_token(token)
+    except Exception as e:
+        return f"⚠️ Error: {str(e)}", []
+    if journal_task:
+        # A failed input write is already logged by its done-callback; keep the reply
+        await asyncio.gather(journal_task, return_exceptions=True)
+    try:
+        return await asyncio.to_thread(process_ai_actions, "".join(buf))
     except Exception as e:
         return f"⚠️ Error: {str(e)}", []
 
 # --- CHAINLIT UI ---
+# Strong references so fire-and-forget writes aren't garbage collected mid-flight
+_background_tasks = set()
+
+def run_in_background(func, *args):
+    """Run a blocking function in a worker thread without awaiting it"""
+    task = asyncio.create_task(asyncio.to_thread(func, *args))
+    _background_tasks.add(task)
+    task.add_done_callback(_on_background_done)
+    return task
+
+def _on_background_done(task):
+    _background_tasks.discard(task)
+    # Surface failed writes (disk full, permissions) instead of dropping them silently
+    if not task.cancelled() and task.exception():
+        logger.error("Background write failed", exc_info=task.exception())
+
+SNAPSHOT_MAX_AGE = 5  # seconds
+
+def take_session_snapshot():
+    """Pop the snapshot saved by on_chat_start if nothing was written since and it's recent"""
+    cached = cl.user_session.get("state_snapshot")
+    if not cached:
+        return None
+    cl.user_session.set("state_snapshot", None)
+    taken, version, snapshot = cached
+    if version != _state_version or time.monotonic() - taken > SNAPSHOT_MAX_AGE:
+        return None
+    return snapshot
 
 @cl.on_chat_start
 async def start():
     """Called when a new chat session starts"""
-    streak = update_streak()
+    # Both take _STATE_LOCK and touch disk, so keep them off the event loop
+    streak = await asyncio.to_thread(update_streak)
     greetings = {"morning": "Good morning", "afternoon": "Good afternoon", "evening": "Good evening"}
     greeting = greetings[get_time_of_day()]
     
-    # Get current status
-    energy = get_latest_energy()
-    open_tasks = get_open_tasks()
-    weekly_completed, weekly_total = get_weekly_progress()
-    recurring = get_recurring_tasks()
-    habits_done = len([h for h in recurring if h["done_today"]])
+    # Get current status; the first message of the session can reuse it
+    s = await asyncio.to_thread(snapshot_state)
+    cl.user_session.set("state_snapshot", (time.monotonic(), _state_version, s))
+    energy = s["energy"]
+    open_tasks = s["open_tasks"]
+    weekly_completed, weekly_total = s["weekly_completed"], s["weekly_total"]
+    recurring = s["recurring"]
+    habits_done = sum(1 for _, done in recurring if done)
     habits_total = len(recurring)
     
     # Build status message
@@ -393,24 +727,30 @@ async def start():
 async def main(message: cl.Message):
     """Called when user sends a message"""
     user_input = message.content
+    if not user_input or not user_input.strip():
+        return
     
-    # Journal the input
-    append_journal(f"💬 {user_input[:100]}{'...' if len(user_input) > 100 else ''}")
+    # Journal the input while the AI request is in flight
+    journal_task = run_in_background(append_journal, f"💬 {user_input[:100]}{'...' if len(user_input) > 100 else ''}")
     
-    # Get AI response
-    response, actions = get_ai_response(user_input)
+    # Stream the AI response; the final content replaces the raw streamed text
+    msg = cl.Message(content="")
+    response, actions = await get_ai_response(user_input, msg, take_session_snapshot(), journal_task)
+    # Still waits out the input write on early returns (no API key, model error);
+    # failures are logged by the done-callback, so they must not abort the send
+    await asyncio.gather(journal_task, return_exceptions=True)
     
     # Build response with actions
     if actions:
         actions_text = "\n".join([f"- {a}" for a in actions])
         full_response = f"{response}\n\n---\n**Actions:**\n{actions_text}"
-        # Journal actions
-        for action in actions:
-            append_journal(action)
+        # Journal actions in one write; it finishes while the reply is sent
+        run_in_background(append_journal_many, actions)
     else:
         full_response = response
     
-    await cl.Message(content=full_response).send()
+    msg.content = full_response
+    await msg.send()
 
 @cl.action_callback("show_tasks")
 async def show_tasks(action):
@@ -445,11 +785,8 @@ async def show_goals(action):
 @cl.action_callback("show_journal")
 async def show_journal(action):
     """Show today's journal"""
-    journal = read_today_journal()
+    journal = read_journal_tail()
     if journal:
-        # Truncate if too long
-        if len(journal) > 1500:
-            journal = journal[:1500] + "\n\n... (truncated)"
         await cl.Message(content=journal).send()
     else:
         await cl.Message(content="No journal entries yet today.").send()
\ No newline at end of file